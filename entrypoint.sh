@@ -8,6 +8,11 @@ case "$MODE" in
     echo "🚀 Starting API server..."
     uvicorn src.api:app --host 0.0.0.0 --port 8000
     ;;
+  serve)
+    WORKERS="${WEB_CONCURRENCY:-$(nproc)}"
+    echo "🏭 Starting API server with $WORKERS workers..."
+    uvicorn src.api:app --host 0.0.0.0 --port 8000 --workers "$WORKERS"
+    ;;
   gui)
     echo "🎨 Starting GUI application..."
     streamlit run src/gui.py --server.port 8501 --server.address 0.0.0.0
@@ -16,6 +21,7 @@ case "$MODE" in
     echo "❌ Unknown mode: $MODE"
     echo "Available modes:"
     echo "  - api    : Start FastAPI server (default)"
+    echo "  - serve  : Start FastAPI server with multiple workers (production)"
     echo "  - gui    : Start Streamlit GUI"
     echo ""
     echo "Usage: docker run topic-shift [MODE]"
@@ -1,52 +1,224 @@
-from typing import List
-from fastapi import FastAPI, File, UploadFile
-from fastapi.responses import FileResponse
-from logic.topic_extraction import TopicsExtractor
+import asyncio
+from typing import TYPE_CHECKING, Awaitable, List, Optional, TypeVar
+from fastapi import FastAPI, File, HTTPException, Request, Response, UploadFile
+from fastapi.responses import FileResponse, JSONResponse
 from logic.json_to_amsl import json_to_amsl
+from models.extraction import ExtractionBudget
 from models.topic import Topic
 import os
+import tempfile
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 from fastapi import Form
+from loguru import logger
+
+if TYPE_CHECKING:
+    # Imported lazily at runtime: langchain, langgraph and pymupdf slow down startup
+    from logic.topic_extraction import TopicsExtractor
+
+# Seconds between two checks whether the client is still connected
+DISCONNECT_POLL_INTERVAL = 0.5
+
+T = TypeVar("T")
+
+
+def create_extractor() -> "TopicsExtractor":
+    """
+    Import the extraction pipeline and build a ready-to-use extractor.
+
+    Returns:
+        TopicsExtractor with initialized model clients and compiled graph
+    """
+    from logic.topic_extraction import TopicsExtractor
+
+    return TopicsExtractor()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Load environment variables from .env file on server startup."""
+    """
+    Load environment variables from .env file on server startup and warm up the
+    extractor in the background, so the server accepts requests immediately.
+    """
     load_dotenv()
 
-    app.state.extractor = TopicsExtractor()
+    start_warmup()
     yield
+    app.state.extractor_warmup.cancel()
 
 
 app = FastAPI(lifespan=lifespan)
 
 
+def start_warmup() -> asyncio.Task:
+    """
+    Build the extractor of this worker process in a background thread.
+
+    Returns:
+        The warm-up task, resolving to the extractor
+    """
+    app.state.extractor_warmup = asyncio.create_task(
+        asyncio.to_thread(create_extractor)
+    )
+    return app.state.extractor_warmup
+
+
+def warmup_failed(warmup: asyncio.Task) -> bool:
+    return warmup.done() and (warmup.cancelled() or warmup.exception() is not None)
+
+
+async def get_extractor() -> "TopicsExtractor":
+    """
+    Wait for the warm-up to finish and return the extractor. A failed warm-up
+    (e.g. missing API key) is retried instead of failing every request for good.
+
+    Returns:
+        The extractor of this worker process
+
+    Raises:
+        HTTPException: 503 if the warm-up failed
+    """
+    warmup: asyncio.Task = app.state.extractor_warmup
+    if warmup_failed(warmup):
+        logger.warning("Extractor warm-up failed before, retrying")
+        warmup = start_warmup()
+    try:
+        # Shield the warm-up so a cancelled request does not cancel it for everyone
+        return await asyncio.shield(warmup)
+    except Exception as e:
+        logger.error(f"Extractor warm-up failed: {e}")
+        raise HTTPException(status_code=503, detail="Extractor warm-up failed")
+
+
+async def wait_for_extractor(deadline_at: Optional[float]) -> "TopicsExtractor":
+    """
+    Wait for the extractor, but no longer than the request's deadline.
+
+    Args:
+        deadline_at: Event loop time of the deadline, or None to wait indefinitely
+
+    Returns:
+        The extractor of this worker process
+
+    Raises:
+        HTTPException: 503 if the warm-up failed or did not finish before the deadline
+    """
+    try:
+        async with asyncio.timeout_at(deadline_at):
+            return await get_extractor()
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail="Extractor is still warming up")
+
+
+async def run_until_disconnected(request: Request, work: Awaitable[T]) -> T:
+    """
+    Run a coroutine and cancel it as soon as the client disconnects.
+
+    Args:
+        request: Request whose connection is watched
+        work: Coroutine to run
+
+    Returns:
+        The result of the coroutine
+
+    Raises:
+        HTTPException: 499 if the client disconnected before the work finished
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while not task.done():
+            await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if not task.done() and await request.is_disconnected():
+                task.cancel()
+                logger.info("Client disconnected, cancelled extraction")
+                raise HTTPException(status_code=499, detail="Client disconnected")
+        return task.result()
+    finally:
+        task.cancel()
+
+
 @app.post("/extract-topics")
 async def extract_topics(
-    description: str = Form(...), file: UploadFile = File(...)
+    request: Request,
+    response: Response,
+    description: str = Form(...),
+    file: UploadFile = File(...),
+    deadline: Optional[float] = Form(None, gt=0),
+    max_calls: Optional[int] = Form(None, gt=0),
+    max_input_tokens: Optional[int] = Form(None, gt=0),
 ) -> List[Topic]:
     """
     Upload a PDF file and extract topics and contents.
 
     Args:
         file: PDF file to upload
+        deadline: Optional time limit in seconds. When it is reached, the topics
+            extracted so far are returned.
+        max_calls: Optional maximum number of LLM calls
+        max_input_tokens: Optional maximum number of estimated input tokens
 
     Returns:
-        TopicExtractionResponse containing extracted topics and contents
+        TopicExtractionResponse containing extracted topics and contents. The
+        X-Pages-Covered, X-Total-Pages and X-Partial-Result headers report how
+        much of the document was analyzed.
     """
-    file_location = f"temp_{file.filename}"
-    with open(file_location, "wb") as f:
+    # The deadline counts from the arrival of the request, not from the first LLM call
+    started_at = asyncio.get_running_loop().time()
+    deadline_at = started_at + deadline if deadline is not None else None
+
+    # Unique path per request: workers share the working directory, and the
+    # client-supplied filename must not decide where the upload is written
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        file_location = f.name
         f.write(await file.read())
 
-    extractor: TopicsExtractor = app.state.extractor
-
-    topics = await extractor.extract_topics(file_location, description=description)
-
-    # Clean up the temporary file
-    os.remove(file_location)
-
-    return topics
+    try:
+        extractor = await wait_for_extractor(deadline_at)
+        result = await run_until_disconnected(
+            request,
+            extractor.extract_topics(
+                file_location,
+                description=description,
+                budget=ExtractionBudget(
+                    max_calls=max_calls,
+                    max_input_tokens=max_input_tokens,
+                    max_seconds=deadline,
+                ),
+                started_at=started_at,
+            ),
+        )
+    finally:
+        # Clean up the temporary file
+        os.remove(file_location)
+
+    response.headers["X-Pages-Covered"] = str(result.pages_covered)
+    response.headers["X-Total-Pages"] = str(result.total_pages)
+    response.headers["X-Partial-Result"] = str(result.partial).lower()
+
+    return result.topics
+
+
+@app.get("/health")
+async def health() -> dict:
+    """Liveness check, answers as soon as the worker is running."""
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    """
+    Readiness check, answers 200 once the extractor is warmed up and 503 before.
+    A failed warm-up is reported once and retried in the background. With several
+    workers, the answer only covers the worker process that handled the probe.
+    """
+    warmup: asyncio.Task = app.state.extractor_warmup
+    if warmup_failed(warmup):
+        logger.warning("Extractor warm-up failed, retrying")
+        start_warmup()
+        return JSONResponse({"status": "failed"}, status_code=503)
+    if not warmup.done():
+        return JSONResponse({"status": "warming_up"}, status_code=503)
+    return JSONResponse({"status": "ready"})
 
 
 @app.post("/json-to-amsl")
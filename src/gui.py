@@ -4,9 +4,13 @@ import asyncio
 import os
 from dotenv import load_dotenv
 from logic.topic_extraction import TopicsExtractor
+from models.extraction import ExtractionBudget
 import json
 import yaml
 
+# Limits for the quick preview mode
+PREVIEW_BUDGET = ExtractionBudget(max_calls=8, max_seconds=30)
+
 # Page configuration
 st.set_page_config(
     page_title="Topic Shift 📚",
@@ -163,6 +167,8 @@ if "error" not in st.session_state:
     st.session_state.error = None
 if "file_name" not in st.session_state:
     st.session_state.file_name = None
+if "coverage" not in st.session_state:
+    st.session_state.coverage = None
 if "extractor" not in st.session_state:
     load_dotenv()
     st.session_state.extractor = TopicsExtractor()
@@ -186,6 +192,12 @@ with col1:
         "📎 Choose a PDF file", type=["pdf"], label_visibility="collapsed"
     )
 
+    # Preview toggle
+    quick_preview = st.toggle(
+        "⚡ Quick preview",
+        help="Analyze only the most important pages for a fast, approximate result",
+    )
+
     # Process button
     col_btn1, col_btn2 = st.columns(2)
     with col_btn1:
@@ -203,6 +215,7 @@ with col1:
                 st.session_state.topics = None
                 st.session_state.error = None
                 st.session_state.file_name = None
+                st.session_state.coverage = None
                 st.rerun()
 
 with col2:
@@ -210,6 +223,8 @@ with col2:
     if st.session_state.topics:
         st.markdown(f"✅ **Document:** {st.session_state.file_name}")
         st.markdown(f"📊 **Topics Found:** {len(st.session_state.topics)}")
+        if st.session_state.coverage:
+            st.markdown(f"📄 **Pages Analyzed:** {st.session_state.coverage}")
 
         # Calculate statistics
         high = sum(1 for t in st.session_state.topics if t.get("importance") == "high")
@@ -259,9 +274,14 @@ if process_btn and uploaded_file and description:
 
         # Extract topics directly using the logic
         extractor: TopicsExtractor = st.session_state.extractor
-        topics = asyncio.run(
-            extractor.extract_topics(file_location, description=description)
+        result = asyncio.run(
+            extractor.extract_topics(
+                file_location,
+                description=description,
+                budget=PREVIEW_BUDGET if quick_preview else None,
+            )
         )
+        topics = result.topics
 
         # Convert topics to dict format for display
         topics_dict = [
@@ -278,6 +298,7 @@ if process_btn and uploaded_file and description:
         progress_bar.progress(100)
         st.session_state.topics = topics_dict
         st.session_state.file_name = uploaded_file.name
+        st.session_state.coverage = f"{result.pages_covered}/{result.total_pages}"
 
         with status_placeholder.container():
             st.success("✅ Topics extracted successfully!")
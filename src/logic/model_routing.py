@@ -0,0 +1,80 @@
+import re
+from enum import StrEnum
+
+# Rough characters-per-token ratio for OpenAI tokenizers on mixed German/English text
+CHARS_PER_TOKEN = 4
+# Pages with this many estimated tokens count as "long" for the length score
+LONG_PAGE_TOKENS = 1200
+# Average line length (in characters) that counts as running prose
+PROSE_LINE_LENGTH = 80
+
+BULLET_PREFIXES = ("-", "•", "–", "*", "▪", "◦", "→")
+FORMULA_CHARS = set("=∑∫∂√±≤≥≈∞∈∀∃⇒⇔λσμπθαβγδΔ∇")
+# Sub- and superscripts like "x^2" or "a_i", but not snake_case identifiers
+SCRIPT_PATTERN = re.compile(r"(?<!\w)[A-Za-z][\^_][\w{]")
+
+
+class ModelTier(StrEnum):
+    FAST = "fast"
+    STRONG = "strong"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text without calling a tokenizer.
+
+    Args:
+        text: Text to estimate
+
+    Returns:
+        Estimated token count
+    """
+    return len(text) // CHARS_PER_TOKEN
+
+
+def score_page_complexity(text: str) -> float:
+    """
+    Score how demanding a page is for topic extraction, based on its length,
+    its structure (bullet points vs. prose) and the density of formula symbols.
+
+    Args:
+        text: Raw text of a page or chunk
+
+    Returns:
+        Complexity score between 0.0 (trivial) and 1.0 (very dense)
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return 0.0
+
+    length_score = min(estimate_tokens(text) / LONG_PAGE_TOKENS, 1.0)
+
+    avg_line_length = sum(len(line) for line in lines) / len(lines)
+    prose_score = min(avg_line_length / PROSE_LINE_LENGTH, 1.0)
+    bullet_ratio = sum(1 for line in lines if line.startswith(BULLET_PREFIXES)) / len(
+        lines
+    )
+    structure_score = prose_score * (1.0 - bullet_ratio)
+
+    formula_symbols = sum(1 for char in text if char in FORMULA_CHARS)
+    formula_symbols += len(SCRIPT_PATTERN.findall(text))
+    formula_ratio = formula_symbols / len(text)
+    formula_score = min(formula_ratio * 20, 1.0)
+
+    return 0.5 * length_score + 0.25 * structure_score + 0.25 * formula_score
+
+
+def route_page(text: str, threshold: float) -> ModelTier:
+    """
+    Pick the model tier for a page.
+
+    Args:
+        text: Raw text of a page or chunk
+        threshold: Complexity score from which the strong tier is used
+
+    Returns:
+        The model tier that should analyze the page
+    """
+    if score_page_complexity(text) >= threshold:
+        return ModelTier.STRONG
+    return ModelTier.FAST
@@ -0,0 +1,164 @@
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+from logic.model_routing import estimate_tokens
+
+# Lines like "2 Methodology", "3.1. Results" or "Kapitel 4: Transaktionen". Section
+# numbers have at most two digits per level so years ("2019 Conference") don't match.
+SECTION_HEADING = re.compile(
+    r"^(\d{1,2}(\.\d{1,2})*\.?"
+    r"|(?i:chapter|kapitel|section|abschnitt|part|teil)\s+\d{1,2}\s*[:.]?)"
+    r"\s+[A-ZÄÖÜ]"
+)
+# Headings are short, longer numbered lines are usually list items
+MAX_HEADING_LENGTH = 60
+
+
+def normalize_line(line: str) -> str:
+    """Strip a line and mask its numbers, so "12 Author" and "13 Author" are equal"""
+    return re.sub(r"\d+", "#", line.strip())
+
+
+def find_repeated_lines(pages: List[str]) -> Set[str]:
+    """
+    Find lines that repeat on most pages, like running headers and footers.
+
+    Args:
+        pages: Raw text of the pages or chunks
+
+    Returns:
+        Normalized lines that occur on more than half of the pages
+    """
+    if len(pages) < 3:
+        return set()
+    counts = Counter(
+        line
+        for page in pages
+        for line in {normalize_line(line) for line in page.splitlines()}
+        if line
+    )
+    return {line for line, count in counts.items() if count > len(pages) / 2}
+
+
+def is_section_start(text: str, repeated_lines: Set[str] = frozenset()) -> bool:
+    """
+    Check whether a page or chunk contains the start of a new section.
+
+    Args:
+        text: Raw text of a page or chunk
+        repeated_lines: Normalized header/footer lines to ignore
+
+    Returns:
+        True if one of its lines looks like a section heading
+    """
+    return any(
+        len(line) <= MAX_HEADING_LENGTH
+        and SECTION_HEADING.match(line)
+        and normalize_line(line) not in repeated_lines
+        for line in (line.strip() for line in text.splitlines())
+    )
+
+
+def spread_order(count: int) -> List[int]:
+    """
+    Order page indices so that every prefix is spread evenly across the document
+    (first, middle, quarters, eighths, ...).
+
+    Args:
+        count: Number of pages
+
+    Returns:
+        All indices from 0 to count - 1 in spread order
+    """
+    order: Dict[int, None] = {}
+    step = count
+    while step >= 1 and len(order) < count:
+        for start in range(0, count, step):
+            order.setdefault(start, None)
+        step //= 2
+    return list(order)
+
+
+def interleave(streams: List[Iterable[int]]) -> List[int]:
+    """
+    Merge index streams round-robin, skipping indices that were already taken.
+
+    Args:
+        streams: Index sequences, each ordered by its own priority
+
+    Returns:
+        Unique indices in merged order
+    """
+    iterators = [iter(stream) for stream in streams]
+    merged: Dict[int, None] = {}
+    while iterators:
+        for iterator in list(iterators):
+            for index in iterator:
+                if index not in merged:
+                    merged[index] = None
+                    break
+            else:
+                iterators.remove(iterator)
+    return list(merged)
+
+
+def prioritize_pages(pages: List[str]) -> List[int]:
+    """
+    Order pages by how much they are expected to contribute to the topic list.
+    Section starts, evenly spread pages and the densest pages take turns, so section
+    starts fill at most every third slot and any budget includes a spread sample.
+
+    Args:
+        pages: Raw text of the pages or chunks
+
+    Returns:
+        All page indices, most valuable first
+    """
+    tokens = [estimate_tokens(page) for page in pages]
+    by_density = sorted(range(len(pages)), key=lambda index: -tokens[index])
+    repeated_lines = find_repeated_lines(pages)
+    section_starts = [
+        index for index in by_density if is_section_start(pages[index], repeated_lines)
+    ]
+    return interleave([section_starts, spread_order(len(pages)), by_density])
+
+
+def select_pages(
+    pages: List[str],
+    max_calls: Optional[int] = None,
+    max_input_tokens: Optional[int] = None,
+    tokens_per_call: int = 0,
+) -> List[int]:
+    """
+    Pick the pages to analyze within a call and token budget and the order to
+    analyze them in. The first half of the selection is a coarse pass over the most
+    valuable pages, the second half refines the result afterwards. Both passes keep
+    document order so topics are created in reading order.
+
+    Args:
+        pages: Raw text of the pages or chunks
+        max_calls: Maximum number of LLM calls, unlimited if None
+        max_input_tokens: Maximum number of estimated input tokens, unlimited if None
+        tokens_per_call: Estimated tokens sent with every page besides its text
+
+    Returns:
+        Indices of the selected pages in processing order
+    """
+    selected: List[int] = []
+    used_tokens = 0
+    for index in prioritize_pages(pages):
+        if max_calls is not None and len(selected) >= max_calls:
+            break
+        page_tokens = estimate_tokens(pages[index]) + tokens_per_call
+        if (
+            max_input_tokens is not None
+            and used_tokens + page_tokens > max_input_tokens
+        ):
+            # Smaller pages further down the priority list may still fit
+            continue
+        selected.append(index)
+        used_tokens += page_tokens
+
+    coarse_count = (len(selected) + 1) // 2
+    return sorted(selected[:coarse_count]) + sorted(selected[coarse_count:])
@@ -0,0 +1,42 @@
+import os
+
+from pydantic import BaseModel, Field
+
+
+class Settings(BaseModel):
+    """Runtime configuration, read from environment variables (and .env)"""
+
+    fast_model: str = Field(
+        default="gpt-5-nano",
+        description="Model used for simple pages (few bullet points, little text)",
+    )
+    strong_model: str = Field(
+        default="gpt-5-mini",
+        description="Model used for dense pages (long text, derivations, formulas)",
+    )
+    complexity_threshold: float = Field(
+        default=0.5,
+        ge=0.0,
+        le=1.0,
+        description="Pages scoring at or above this complexity go to the strong model",
+    )
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        Build settings from environment variables, falling back to the defaults.
+
+        Returns:
+            Settings populated from TOPIC_SHIFT_* environment variables
+
+        Raises:
+            pydantic.ValidationError: If a variable holds an invalid value
+        """
+        env_values = {
+            "fast_model": os.getenv("TOPIC_SHIFT_FAST_MODEL"),
+            "strong_model": os.getenv("TOPIC_SHIFT_STRONG_MODEL"),
+            "complexity_threshold": os.getenv("TOPIC_SHIFT_COMPLEXITY_THRESHOLD"),
+        }
+        return cls.model_validate(
+            {name: value for name, value in env_values.items() if value is not None}
+        )
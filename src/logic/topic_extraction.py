@@ -1,11 +1,16 @@
 # Goal: Get list of topics with list of contents. Handle massive PDFs.
 # Idea: Chunking PDF into smaller parts, extract topics from each chunk, then aggregate.
 
+import asyncio
 import operator
-from typing import Annotated, List, Optional, Optional
+from typing import Annotated, List, Optional
 
 from pydantic import BaseModel
 from logic.pdf_content_loading import extract_pdf_contents
+from logic.model_routing import ModelTier, estimate_tokens, route_page
+from logic.page_selection import select_pages
+from logic.settings import Settings
+from models.extraction import ExtractionBudget, ExtractionMetrics, ExtractionResult
 from models.topic import Topic
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -13,6 +18,96 @@ from langgraph.types import Command
 from langgraph.graph import StateGraph, START
 from loguru import logger
 
+# Bump whenever EXTRACTION_PROMPT changes, a new version invalidates prompt caches
+EXTRACTION_PROMPT_VERSION = "v1"
+
+# Static instructions, identical for every call. Per-document and per-page data is
+# sent in separate messages after it so the prefix stays cacheable.
+EXTRACTION_PROMPT = (
+    f"### PROMPT VERSION {EXTRACTION_PROMPT_VERSION} ###\n" + """### ROLE ###
+You are an expert AI assistant specializing in PDF content analysis and topic extraction. You will analyze page content and return a structured list of topics.
+
+### GOAL ###
+Your primary goal is to extract **only significant, substantive topics** and their corresponding summary/content from the provided page text. You must differentiate between actual content and document artifacts and assign an importance level to each topic.
+You want to keep the number of topics low and try to summarize related content under existing topics whenever possible.
+Be aware that each call only covers one Page of the PDF at a time. The aggregation of all topics across all pages should be small enough to fit into a single call later on.
+
+### CONTEXT & INPUTS ###
+* **PDF Description:** [Provided in the DOCUMENT CONTEXT message after this prompt]
+* **Current Topics (for reuse):** [Provided in the EXTRACTION STATE message after the document context]
+* **Page Content to Analyze:** [The raw text from the page will be provided after these messages]
+
+### OUTPUT FORMAT ###
+You MUST respond with a JSON-compatible list of dictionaries. Each dictionary must have three keys: 'id', 'topic', 'content', 'goal' and 'importance'. Do not provide any other text, preamble, or explanation.
+Be aware that each call only covers one Page of the PDF at a time. The aggregation of all topics across all pages should be small enough to fit into a single call later on.
+The number of contents extracted so far is given in the EXTRACTION STATE message.
+
+**Example Format:**
+[
+    {
+        "id": : "snake_case_title_1",
+        "topic": "Topic Title 1",
+        "contents": [
+            "Detail about Key Point A",
+            "Detail about Key Point B"
+        ],
+        "goal": "Understand basics of ...",
+        "importance": "high"
+    },
+    {
+        "id": : "snake_case_title_2",
+        "topic": "Topic Title 2",
+        "contents": [
+            "Detail about another point less central to the main themes",
+            "Additional context or information related to Topic Title 2"
+        ],
+        "goal": "Understand basics of ...",
+        "importance": "low"
+    },
+    {
+        "id": "snake_case_title_3",
+        "topic": "Topic Title 3",
+        "contents": [
+            "Detail about another point less but more central to the main themes",
+            "Additional context or information related to Topic Title 3"
+        ],
+        "goal": "Understand basics of ...",
+        "importance": "medium"
+    }
+]
+
+### CORE INSTRUCTIONS ###
+1.  **Focus on Substance:** Identify the main themes, sections, or ideas on the page. A topic should represent a distinct, meaningful concept, argument, or data set.
+2.  **Filter Aggressively:** You **MUST** ignore and filter out all non-substantive elements. Do **NOT** create topics for:
+    * Page numbers (e.g., "Page 5", "- 5 -")
+    * Document headers and footers (e.g., running titles, confidentiality notices)
+    * Table of Contents entries (unless the *entire* page is the ToC itself)
+    * Reference lists / Bibliographies (unless the specific topic is "References")
+    * Formatting artifacts (e.g., random characters, excessive line breaks)
+    * Isolated tables or images without surrounding explanatory text.
+3.  **Topic Management:**
+    * **Reuse First:** Before creating a new topic, check if the content logically fits under one of the `Current Topics` from the EXTRACTION STATE message.
+    * **Create New:** If the content is new and significant, create a concise, descriptive new topic title. Try to generate 1 topic per page maximum.
+4.  **Content Summarization:**
+    * For each topic, summarize the relevant content from the page into clear, concise bullet points or sentences.
+    * Each content item should be a brief but informative snippet that captures the essence of the information related to the topic.
+    * Try to summarize concepts into one bullet point whenever possible.
+    * Try to keep the number of content items per topic low (avg 3).
+5.  **Handle Empty/Noisy Pages:**
+    * If the page content, after filtering out all the elements from rule #2, contains no meaningful information, you **MUST** return an empty list `[]`.
+    * Do not include pages like "Lernziele", "Contents", "Index", "Agenda", "Referenzen", "References" or similar non-content pages.
+6.  **Assign Importance:** For each topic you extract, assign an `importance` rating based on this rubric:
+    * **"High":** For primary topics. This includes major section headings (e.g., "Chapter 2", "Introduction," "Methodology") or content that is central to the `PDF Description`.
+    * **"Medium":** For standard sub-topics or distinct, complete arguments that are part of a larger section.
+    * **"Low":** For minor points, sidebars, detailed examples, or tangential information.
+"""
+)
+
+# Estimated tokens of the instruction prompt sent along with every page
+PROMPT_TOKENS_ESTIMATE = estimate_tokens(EXTRACTION_PROMPT)
+# Allowance for the headers of the context messages and the growing topic list
+STATE_TOKENS_ALLOWANCE = 150
+
 
 class State(BaseModel):
     """State to hold intermediate data during topic extraction"""
@@ -23,8 +118,15 @@ class State(BaseModel):
     ] = None
 
     page_contents: List[str]
+    page_order: Annotated[
+        List[int], "Indices of the pages to analyze, in processing order"
+    ] = []
     current_page: int = 0
+    max_input_tokens: Annotated[
+        Optional[int], "Stop once the next call would exceed this many input tokens"
+    ] = None
     topics: List[Topic] = []
+    metrics: ExtractionMetrics = ExtractionMetrics()
 
 
 class Topics(BaseModel):
@@ -34,10 +136,16 @@ class Topics(BaseModel):
 
 
 class TopicsExtractor:
-    def __init__(self):
-        self.model = ChatOpenAI(name="gpt-5-mini").with_structured_output(
-            Topics, strict=True
-        )
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or Settings.from_env()
+        self.models = {
+            ModelTier.FAST: ChatOpenAI(
+                model=self.settings.fast_model
+            ).with_structured_output(Topics, strict=True, include_raw=True),
+            ModelTier.STRONG: ChatOpenAI(
+                model=self.settings.strong_model
+            ).with_structured_output(Topics, strict=True, include_raw=True),
+        }
         graph = StateGraph(State)
 
         graph.add_node(
@@ -62,99 +170,53 @@ class TopicsExtractor:
         current_topics = ", ".join([topic.title for topic in state.topics])
         contents_len = sum([len(content.contents) for content in state.topics])
         logger.info("Current topics: " + current_topics)
-        if state.current_page >= len(state.page_contents):
+        if state.current_page >= len(state.page_order):
             return Command(goto="end", update=state)
 
-        current_content = state.page_contents[state.current_page]
-        state.current_page += 1
+        current_content = state.page_contents[state.page_order[state.current_page]]
 
         messages = [
+            # Byte-stable prefix first so provider-side prompt caching can apply
+            SystemMessage(EXTRACTION_PROMPT),
             SystemMessage(
-                f"""
-                ### ROLE ###
-                You are an expert AI assistant specializing in PDF content analysis and topic extraction. You will analyze page content and return a structured list of topics.
-
-                ### GOAL ###
-                Your primary goal is to extract **only significant, substantive topics** and their corresponding summary/content from the provided page text. You must differentiate between actual content and document artifacts and assign an importance level to each topic.
-                You want to keep the number of topics low and try to summarize related content under existing topics whenever possible.
-                Be aware that each call only covers one Page of the PDF at a time. The aggregation of all topics across all pages should be small enough to fit into a single call later on.
-                    
-                ### CONTEXT & INPUTS ###
-                * **PDF Description:** {description}
-                * **Current Topics (for reuse):** {current_topics}
-                * **Page Content to Analyze:** [The raw text from the page will be provided after this prompt]
-
-                ### OUTPUT FORMAT ###
-                You MUST respond with a JSON-compatible list of dictionaries. Each dictionary must have three keys: 'id', 'topic', 'content', 'goal' and 'importance'. Do not provide any other text, preamble, or explanation.
-                Be aware that each call only covers one Page of the PDF at a time. The aggregation of all topics across all pages should be small enough to fit into a single call later on.
-                You already have {contents_len} contents extracted so far.
-                
-                **Example Format:**
-                [
-                    {{
-                        "id": : "snake_case_title_1",
-                        "topic": "Topic Title 1",
-                        "contents": [
-                            "Detail about Key Point A",
-                            "Detail about Key Point B"
-                        ],
-                        "goal": "Understand basics of ...",
-                        "importance": "high"
-                    }},
-                    {{
-                        "id": : "snake_case_title_2",
-                        "topic": "Topic Title 2",
-                        "contents": [
-                            "Detail about another point less central to the main themes",
-                            "Additional context or information related to Topic Title 2"
-                        ],
-                        "goal": "Understand basics of ...",
-                        "importance": "low"
-                    }},
-                    {{
-                        "id": "snake_case_title_3",
-                        "topic": "Topic Title 3",
-                        "contents": [
-                            "Detail about another point less but more central to the main themes",
-                            "Additional context or information related to Topic Title 3"
-                        ],
-                        "goal": "Understand basics of ...",
-                        "importance": "medium"
-                    }}
-                ]
-
-                ### CORE INSTRUCTIONS ###
-                1.  **Focus on Substance:** Identify the main themes, sections, or ideas on the page. A topic should represent a distinct, meaningful concept, argument, or data set.
-                2.  **Filter Aggressively:** You **MUST** ignore and filter out all non-substantive elements. Do **NOT** create topics for:
-                    * Page numbers (e.g., "Page 5", "- 5 -")
-                    * Document headers and footers (e.g., running titles, confidentiality notices)
-                    * Table of Contents entries (unless the *entire* page is the ToC itself)
-                    * Reference lists / Bibliographies (unless the specific topic is "References")
-                    * Formatting artifacts (e.g., random characters, excessive line breaks)
-                    * Isolated tables or images without surrounding explanatory text.
-                3.  **Topic Management:**
-                    * **Reuse First:** Before creating a new topic, check if the content logically fits under one of the `Current Topics`: {current_topics}.
-                    * **Create New:** If the content is new and significant, create a concise, descriptive new topic title. Try to generate 1 topic per page maximum.
-                4.  **Content Summarization:** 
-                    * For each topic, summarize the relevant content from the page into clear, concise bullet points or sentences. 
-                    * Each content item should be a brief but informative snippet that captures the essence of the information related to the topic.
-                    * Try to summarize concepts into one bullet point whenever possible.
-                    * Try to keep the number of content items per topic low (avg 3).
-                5.  **Handle Empty/Noisy Pages:** 
-                    * If the page content, after filtering out all the elements from rule #2, contains no meaningful information, you **MUST** return an empty list `[]`.
-                    * Do not include pages like "Lernziele", "Contents", "Index", "Agenda", "Referenzen", "References" or similar non-content pages.
-                6.  **Assign Importance:** For each topic you extract, assign an `importance` rating based on this rubric:
-                    * **"High":** For primary topics. This includes major section headings (e.g., "Chapter 2", "Introduction," "Methodology") or content that is central to the `PDF Description`.
-                    * **"Medium":** For standard sub-topics or distinct, complete arguments that are part of a larger section.
-                    * **"Low":** For minor points, sidebars, detailed examples, or tangential information.
-                """
+                f"### DOCUMENT CONTEXT ###\n* **PDF Description:** {description}"
+            ),
+            SystemMessage(
+                "### EXTRACTION STATE ###\n"
+                f"* **Current Topics (for reuse):** {current_topics}\n"
+                f"* **Contents extracted so far:** {contents_len}"
             ),
             HumanMessage(content=current_content),
         ]
 
-        response = await self.model.ainvoke(messages)
-        logger.info(f"Received response: {response}")
-        topics = Topics.model_validate(response)
+        call_tokens = estimate_tokens("".join(message.content for message in messages))
+        if (
+            state.max_input_tokens is not None
+            and state.metrics.estimated_input_tokens + call_tokens
+            > state.max_input_tokens
+        ):
+            logger.info("Input token budget exhausted, stopping extraction")
+            return Command(goto="end", update=state)
+        state.current_page += 1
+
+        # Route simple pages to the fast tier and dense pages to the strong tier
+        tier = route_page(current_content, self.settings.complexity_threshold)
+        logger.info(f"Routing page {state.current_page} to {tier} model")
+
+        response = await self.models[tier].ainvoke(messages)
+        # Record only completed calls, a call cancelled by the deadline is not counted
+        state.metrics.record_call(tier, call_tokens)
+        logger.info(f"Received response: {response['parsed']}")
+        if response["parsing_error"]:
+            raise response["parsing_error"]
+        topics = Topics.model_validate(response["parsed"])
+
+        usage = response["raw"].usage_metadata or {}
+        state.metrics.record_usage(
+            input_tokens=usage.get("input_tokens") or 0,
+            cached_input_tokens=usage.get("input_token_details", {}).get("cache_read")
+            or 0,
+        )
 
         for topic in topics.topics:
             # Check if topic already exists
@@ -169,8 +231,22 @@ class TopicsExtractor:
 
         return Command(goto="extract", update=state)
 
-    async def extract_topics(self, pdf_path: str, description: str) -> List[Topic]:
-        page_contents = extract_pdf_contents(pdf_path)
+    async def prepare_state(
+        self, pdf_path: str, description: str, budget: ExtractionBudget
+    ) -> State:
+        """
+        Parse the PDF, merge small pages and pick the pages to analyze.
+
+        Args:
+            pdf_path: Path to the PDF file
+            description: Context description of the PDF
+            budget: Limits on LLM calls and input tokens
+
+        Returns:
+            Initial State for the extraction graph
+        """
+        # Parse in a worker thread so the event loop keeps serving other requests
+        page_contents = await asyncio.to_thread(extract_pdf_contents, pdf_path)
 
         # Merge pages with very little content
         merged_pages = []
@@ -187,10 +263,92 @@ class TopicsExtractor:
         logger.info(
             f"Extracted {len(page_contents)} pages from PDF. Merged to {len(merged_pages)} pages."
         )
-        state = State(page_contents=merged_pages, description=description)
-        state = await self.graph.ainvoke(
-            state, {"recursion_limit": len(merged_pages) + 2}
+        # A time limit alone keeps document order, so a run that finishes in time
+        # gives the same result as an unbudgeted one
+        if budget.max_calls is not None or budget.max_input_tokens is not None:
+            page_order = select_pages(
+                merged_pages,
+                max_calls=budget.max_calls,
+                max_input_tokens=budget.max_input_tokens,
+                tokens_per_call=PROMPT_TOKENS_ESTIMATE
+                + estimate_tokens(description)
+                + STATE_TOKENS_ALLOWANCE,
+            )
+            logger.info(f"Budget {budget} selected {len(page_order)} pages")
+        else:
+            page_order = list(range(len(merged_pages)))
+
+        return State(
+            page_contents=merged_pages,
+            page_order=page_order,
+            max_input_tokens=budget.max_input_tokens,
+            description=description,
         )
 
-        formatted_state = State.model_validate(state)
-        return formatted_state.topics
+    async def extract_topics(
+        self,
+        pdf_path: str,
+        description: str,
+        budget: Optional[ExtractionBudget] = None,
+        started_at: Optional[float] = None,
+    ) -> ExtractionResult:
+        """
+        Extract topics from a PDF file.
+
+        Args:
+            pdf_path: Path to the PDF file
+            description: Context description of the PDF
+            budget: Optional limits on LLM calls, input tokens and wall-clock time.
+                With a call or token limit the most valuable pages are analyzed
+                first. A time limit alone keeps document order. When the time limit
+                is reached, in-flight LLM calls are cancelled and the topics found
+                so far are returned.
+            started_at: Event loop time the time limit counts from, e.g. when the
+                request arrived. Defaults to now.
+
+        Returns:
+            ExtractionResult with the topics and the number of covered pages. If the
+            time limit is reached while parsing, it is empty with total_pages 0.
+        """
+        budget = budget or ExtractionBudget()
+        if started_at is None:
+            started_at = asyncio.get_running_loop().time()
+        deadline_at = (
+            started_at + budget.max_seconds if budget.max_seconds is not None else None
+        )
+
+        # Keep the latest state so a time limit can still return partial results
+        latest_state: Optional[State] = None
+        try:
+            async with asyncio.timeout_at(deadline_at):
+                state = await self.prepare_state(pdf_path, description, budget)
+                latest_state = state
+                async for latest_state in self.graph.astream(
+                    state,
+                    {"recursion_limit": len(state.page_order) + 2},
+                    stream_mode="values",
+                ):
+                    pass
+        except TimeoutError:
+            logger.warning(
+                f"Time limit of {budget.max_seconds}s reached, returning partial result"
+            )
+
+        if latest_state is None:
+            return ExtractionResult(
+                topics=[], pages_covered=0, total_pages=0, partial=True
+            )
+
+        formatted_state = State.model_validate(latest_state)
+        logger.info(
+            f"Extraction metrics: {formatted_state.metrics}, "
+            f"prompt cache hit rate: {formatted_state.metrics.cache_hit_rate:.0%}"
+        )
+        total_pages = len(formatted_state.page_contents)
+        return ExtractionResult(
+            topics=formatted_state.topics,
+            pages_covered=formatted_state.current_page,
+            total_pages=total_pages,
+            partial=formatted_state.current_page < total_pages,
+            metrics=formatted_state.metrics,
+        )
@@ -0,0 +1,70 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+from models.topic import Topic
+
+
+class ExtractionMetrics(BaseModel):
+    """Model collecting statistics about the LLM calls of one extraction"""
+
+    calls_per_tier: Dict[str, int] = Field(
+        default={}, description="Number of LLM calls routed to each model tier"
+    )
+    input_tokens_per_tier: Dict[str, int] = Field(
+        default={}, description="Estimated input tokens sent to each model tier"
+    )
+
+    input_tokens: int = Field(
+        default=0, description="Input tokens reported by the provider"
+    )
+    cached_input_tokens: int = Field(
+        default=0, description="Input tokens served from the provider's prompt cache"
+    )
+
+    def record_call(self, tier: str, input_tokens: int) -> None:
+        self.calls_per_tier[tier] = self.calls_per_tier.get(tier, 0) + 1
+        self.input_tokens_per_tier[tier] = (
+            self.input_tokens_per_tier.get(tier, 0) + input_tokens
+        )
+
+    def record_usage(self, input_tokens: int, cached_input_tokens: int) -> None:
+        self.input_tokens += input_tokens
+        self.cached_input_tokens += cached_input_tokens
+
+    @property
+    def estimated_input_tokens(self) -> int:
+        """Estimated input tokens sent across all model tiers"""
+        return sum(self.input_tokens_per_tier.values())
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of input tokens that were read from the prompt cache"""
+        if not self.input_tokens:
+            return 0.0
+        return self.cached_input_tokens / self.input_tokens
+
+
+class ExtractionBudget(BaseModel):
+    """Model limiting the cost of one extraction. Unset limits are unlimited."""
+
+    max_calls: Optional[int] = Field(
+        default=None, gt=0, description="Maximum number of LLM calls"
+    )
+    max_input_tokens: Optional[int] = Field(
+        default=None, gt=0, description="Maximum number of estimated input tokens"
+    )
+    max_seconds: Optional[float] = Field(
+        default=None, gt=0, description="Wall-clock limit for the extraction"
+    )
+
+
+class ExtractionResult(BaseModel):
+    """Model holding the outcome of one extraction, possibly limited by a budget"""
+
+    topics: List[Topic] = Field(description="Extracted topics")
+    pages_covered: int = Field(description="Number of pages that were analyzed")
+    total_pages: int = Field(description="Number of pages of the document")
+    partial: bool = Field(
+        default=False,
+        description="True if not all pages of the document were analyzed",
+    )
+    metrics: ExtractionMetrics = ExtractionMetrics()
@@ -0,0 +1,91 @@
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from models.extraction import ExtractionResult
+
+
+class FileSizeExtractor:
+    """Reports the size of the uploaded file after a pause, as total_pages"""
+
+    async def extract_topics(self, pdf_path, description, budget, started_at):
+        await asyncio.sleep(0.2)
+        with open(pdf_path, "rb") as pdf_file:
+            size = len(pdf_file.read())
+        return ExtractionResult(topics=[], pages_covered=size, total_pages=size)
+
+
+@pytest.fixture
+def upload_dir(monkeypatch, tmp_path):
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(upload_dir))
+    monkeypatch.chdir(tmp_path)
+    return upload_dir
+
+
+@pytest.fixture
+def failing_warmup(monkeypatch, upload_dir):
+    attempts = []
+
+    def create_extractor():
+        attempts.append(1)
+        raise RuntimeError("OPENAI_API_KEY is missing")
+
+    monkeypatch.setattr(api, "create_extractor", create_extractor)
+    return attempts
+
+
+def test_failed_warmup_is_retried(failing_warmup):
+    with TestClient(api.app) as client:
+        assert client.get("/health").status_code == 200
+        response = client.get("/ready")
+        while response.json() == {"status": "warming_up"}:
+            response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json() == {"status": "failed"}
+
+        client.get("/ready")
+        assert len(failing_warmup) >= 2
+
+
+def test_failed_warmup_removes_temp_file(failing_warmup, upload_dir):
+    with TestClient(api.app) as client:
+        response = client.post(
+            "/extract-topics",
+            data={"description": "Lecture"},
+            files={"file": ("lecture.pdf", b"%PDF-1.4", "application/pdf")},
+        )
+
+    assert response.status_code == 503
+    assert response.json() == {"detail": "Extractor warm-up failed"}
+    assert list(upload_dir.iterdir()) == []
+
+
+def test_concurrent_uploads_with_same_name_do_not_collide(
+    monkeypatch, upload_dir, tmp_path
+):
+    monkeypatch.setattr(api, "create_extractor", FileSizeExtractor)
+    payloads = [b"%PDF-1.4" + b"a" * 100, b"%PDF-1.4" + b"b" * 5000]
+
+    with TestClient(api.app) as client:
+
+        def upload(payload):
+            return client.post(
+                "/extract-topics",
+                data={"description": "Lecture"},
+                files={"file": ("../lecture.pdf", payload, "application/pdf")},
+            )
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            responses = list(executor.map(upload, payloads))
+
+    for payload, response in zip(payloads, responses):
+        assert response.status_code == 200
+        assert response.headers["X-Total-Pages"] == str(len(payload))
+    assert list(upload_dir.iterdir()) == []
+    assert not (tmp_path.parent / "lecture.pdf").exists()
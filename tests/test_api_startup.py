@@ -0,0 +1,35 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Cold import of api.py must stay well below the ~2s the extraction stack needs
+IMPORT_TIME_BUDGET_SECONDS = 1.5
+HEAVY_MODULES = ["langchain_openai", "langchain_core", "langgraph", "fitz", "pymupdf"]
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+MEASURE_IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+import api
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def test_api_import_is_lazy_and_fast():
+    completed = subprocess.run(
+        [sys.executable, "-c", MEASURE_IMPORT],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    measurement = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    loaded_heavy_modules = [
+        module for module in HEAVY_MODULES if module in measurement["modules"]
+    ]
+    assert loaded_heavy_modules == []
+    assert measurement["elapsed"] < IMPORT_TIME_BUDGET_SECONDS
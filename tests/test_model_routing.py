@@ -0,0 +1,79 @@
+import pytest
+from pydantic import ValidationError
+
+from logic.model_routing import ModelTier, route_page, score_page_complexity
+from logic.settings import Settings
+
+BULLET_SLIDE = """Agenda
+- Motivation
+- Related Work
+- Methods
+- Results
+"""
+PROSE_PAGE = (
+    "Gradient descent iteratively updates the parameters of the model in the "
+    "direction of the negative gradient of the loss function, scaled by a "
+    "learning rate that controls the step size of every single update. "
+) * 25
+FORMULA_PAGE = "∂L/∂w = ∑ (y − ŷ) · x, w ← w − η ∇L, σ(z) ≤ 1, ∫ p(x) dx = 1\n" * 20
+
+
+def test_bullet_slide_routes_to_fast_tier():
+    assert route_page(BULLET_SLIDE, threshold=0.5) == ModelTier.FAST
+
+
+@pytest.mark.parametrize("page", [PROSE_PAGE, FORMULA_PAGE])
+def test_dense_page_routes_to_strong_tier(page):
+    assert route_page(page, threshold=0.5) == ModelTier.STRONG
+
+
+def test_identifiers_do_not_count_as_formulas():
+    code_slide = "snake_case_identifier another_var " * 30
+
+    assert route_page(code_slide, threshold=0.5) == ModelTier.FAST
+
+
+def test_scripts_count_as_formulas():
+    assert score_page_complexity("x^2 + a_i") > score_page_complexity("x2 + ai")
+
+
+def test_threshold_is_inclusive():
+    score = score_page_complexity(PROSE_PAGE)
+
+    assert route_page(PROSE_PAGE, threshold=score) == ModelTier.STRONG
+    assert route_page(PROSE_PAGE, threshold=score + 1e-9) == ModelTier.FAST
+
+
+def test_empty_page_scores_zero():
+    assert score_page_complexity("\n  \n") == 0.0
+
+
+def test_settings_read_env_overrides(monkeypatch):
+    monkeypatch.setenv("TOPIC_SHIFT_FAST_MODEL", "fast-model")
+    monkeypatch.setenv("TOPIC_SHIFT_STRONG_MODEL", "strong-model")
+    monkeypatch.setenv("TOPIC_SHIFT_COMPLEXITY_THRESHOLD", "0.25")
+
+    settings = Settings.from_env()
+
+    assert settings.fast_model == "fast-model"
+    assert settings.strong_model == "strong-model"
+    assert settings.complexity_threshold == 0.25
+
+
+def test_settings_default_without_env(monkeypatch):
+    for name in (
+        "TOPIC_SHIFT_FAST_MODEL",
+        "TOPIC_SHIFT_STRONG_MODEL",
+        "TOPIC_SHIFT_COMPLEXITY_THRESHOLD",
+    ):
+        monkeypatch.delenv(name, raising=False)
+
+    assert Settings.from_env() == Settings()
+
+
+@pytest.mark.parametrize("threshold", ["50", "-0.1", "high"])
+def test_settings_reject_invalid_threshold(monkeypatch, threshold):
+    monkeypatch.setenv("TOPIC_SHIFT_COMPLEXITY_THRESHOLD", threshold)
+
+    with pytest.raises(ValidationError, match="complexity_threshold"):
+        Settings.from_env()
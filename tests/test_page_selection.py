@@ -0,0 +1,64 @@
+from logic.page_selection import (
+    find_repeated_lines,
+    is_section_start,
+    select_pages,
+    spread_order,
+)
+
+BODY = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 20
+
+
+def make_pages(count: int) -> list:
+    return [
+        f"{BODY}\n{index + 1} Linus Bierhoff\n2019 Conference\n3 apples and 5 pears"
+        for index in range(count)
+    ]
+
+
+def test_section_heading_requires_title_word():
+    assert is_section_start("2 Methodology")
+    assert is_section_start("3.1. Results")
+    assert is_section_start("Kapitel 4: Transaktionen")
+    assert not is_section_start("2019 Conference")
+    assert not is_section_start("3 apples and 5 pears")
+
+
+def test_repeated_footers_are_not_section_starts():
+    pages = make_pages(10)
+    repeated_lines = find_repeated_lines(pages)
+
+    assert not any(is_section_start(page, repeated_lines) for page in pages)
+
+
+def test_selection_spreads_across_document():
+    selected = select_pages(make_pages(10), max_calls=3)
+
+    assert len(selected) == 3
+    assert max(selected) >= 5
+
+
+def test_section_starts_leave_room_for_spread_sample():
+    pages = make_pages(10)
+    titles = ["Introduction", "Methods", "Results", "Discussion"]
+    for index, title in enumerate(titles):
+        pages[index] = f"{index + 1} {title}\n{pages[index]}"
+
+    selected = select_pages(pages, max_calls=3)
+
+    assert any(index >= len(titles) for index in selected)
+
+
+def test_token_budget_includes_per_call_tokens():
+    pages = make_pages(10)
+    page_tokens = len(pages[0]) // 4
+
+    selected = select_pages(
+        pages, max_input_tokens=3 * (page_tokens + 500), tokens_per_call=500
+    )
+
+    assert len(selected) == 3
+
+
+def test_spread_order_covers_all_pages():
+    assert sorted(spread_order(7)) == list(range(7))
+    assert spread_order(7)[:2] == [0, 3]
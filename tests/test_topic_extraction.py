@@ -0,0 +1,216 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from logic.model_routing import ModelTier
+from logic.topic_extraction import (
+    EXTRACTION_PROMPT,
+    PROMPT_TOKENS_ESTIMATE,
+    State,
+    Topics,
+    TopicsExtractor,
+)
+from models.extraction import ExtractionBudget
+from models.topic import ImportanceEnum, Topic
+
+
+class StubModel:
+    """Stands in for the structured-output model and records every call"""
+
+    def __init__(self, usage_metadata=None):
+        self.calls = []
+        self.usage_metadata = usage_metadata
+
+    async def ainvoke(self, messages):
+        self.calls.append(messages)
+        return {
+            "raw": AIMessage(content="", usage_metadata=self.usage_metadata),
+            "parsed": Topics(topics=[]),
+            "parsing_error": None,
+        }
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    return TopicsExtractor()
+
+
+def use_stub(extractor: TopicsExtractor, model: StubModel) -> None:
+    extractor.models = {tier: model for tier in ModelTier}
+
+
+def make_topic(title: str, contents: list) -> Topic:
+    return Topic(
+        id=title.lower().replace(" ", "_"),
+        title=title,
+        importance=ImportanceEnum.HIGH,
+        contents=contents,
+        goal=f"Understand {title}",
+    )
+
+
+def test_prompt_prefix_is_stable_across_calls(extractor):
+    model = StubModel()
+    use_stub(extractor, model)
+    states = [
+        State(
+            description="Lecture on Machine Learning",
+            page_contents=["Gradient descent minimizes the loss."],
+            page_order=[0],
+        ),
+        State(
+            description="Vorlesung Datenbanken",
+            page_contents=["Intro", "Normalformen vermeiden Redundanz."],
+            page_order=[1],
+            topics=[
+                make_topic("Relational Algebra", ["Selection", "Projection", "Join"])
+            ],
+        ),
+    ]
+
+    for state in states:
+        asyncio.run(extractor.extract(state))
+
+    assert len(model.calls) == 2
+    for messages in model.calls:
+        prefix = messages[0].content
+        assert prefix == EXTRACTION_PROMPT
+        assert prefix.encode() == EXTRACTION_PROMPT.encode()
+        for leaked in (
+            "Lecture on Machine Learning",
+            "Vorlesung Datenbanken",
+            "Relational Algebra",
+            "Contents extracted so far",
+        ):
+            assert leaked not in prefix
+
+    # The dynamic parts still reach the model after the prefix
+    second_call = "\n".join(message.content for message in model.calls[1][1:])
+    assert "Vorlesung Datenbanken" in second_call
+    assert "Relational Algebra" in second_call
+    assert "Contents extracted so far:** 3" in second_call
+
+
+def test_cached_input_tokens_are_recorded(extractor):
+    model = StubModel(
+        usage_metadata={
+            "input_tokens": 2000,
+            "output_tokens": 50,
+            "total_tokens": 2050,
+            "input_token_details": {"cache_read": 1536},
+        }
+    )
+    use_stub(extractor, model)
+    state = State(
+        description="Lecture on Machine Learning",
+        page_contents=["Page one", "Page two"],
+        page_order=[0, 1],
+    )
+
+    asyncio.run(extractor.extract(state))
+    asyncio.run(extractor.extract(state))
+
+    assert state.metrics.input_tokens == 4000
+    assert state.metrics.cached_input_tokens == 3072
+    assert state.metrics.cache_hit_rate == pytest.approx(0.768)
+
+
+def test_input_token_budget_is_enforced_per_call(extractor):
+    model = StubModel()
+    use_stub(extractor, model)
+    state = State(
+        description="Lecture on Machine Learning",
+        page_contents=["Short page", "x" * 4000],
+        page_order=[0, 1],
+        max_input_tokens=PROMPT_TOKENS_ESTIMATE + 200,
+    )
+
+    asyncio.run(extractor.extract(state))
+    asyncio.run(extractor.extract(state))
+
+    assert len(model.calls) == 1
+    assert state.current_page == 1
+    assert state.metrics.estimated_input_tokens <= state.max_input_tokens
+
+
+def test_deadline_alone_keeps_document_order(extractor, monkeypatch):
+    model = StubModel()
+    use_stub(extractor, model)
+    pages = [f"{index + 1} Chapter\n" + "Text. " * (200 * index) for index in range(5)]
+    monkeypatch.setattr(
+        "logic.topic_extraction.extract_pdf_contents", lambda pdf_path: pages
+    )
+
+    result = asyncio.run(
+        extractor.extract_topics(
+            "lecture.pdf",
+            description="Lecture",
+            budget=ExtractionBudget(max_seconds=60),
+        )
+    )
+
+    analyzed = [messages[-1].content for messages in model.calls]
+    assert analyzed == sorted(analyzed, key=pages.index)
+    assert not result.partial
+
+
+def test_deadline_covers_pdf_parsing(extractor, monkeypatch):
+    def slow_parse(pdf_path):
+        time.sleep(1.0)
+        return ["Page"]
+
+    monkeypatch.setattr("logic.topic_extraction.extract_pdf_contents", slow_parse)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        # The request arrived 0.1s ago, so only 0.2s of the deadline are left
+        started_at = loop.time() - 0.1
+        result = await extractor.extract_topics(
+            "lecture.pdf",
+            description="Lecture",
+            budget=ExtractionBudget(max_seconds=0.3),
+            started_at=started_at,
+        )
+        return result, loop.time() - started_at
+
+    result, elapsed = asyncio.run(run())
+
+    assert result.partial
+    assert result.pages_covered == 0
+    assert elapsed < 0.6
+
+
+class SlowStubModel(StubModel):
+    """Answers the first calls right away and hangs on every later one"""
+
+    def __init__(self, fast_calls: int):
+        super().__init__()
+        self.fast_calls = fast_calls
+
+    async def ainvoke(self, messages):
+        if len(self.calls) >= self.fast_calls:
+            await asyncio.sleep(10)
+        return await super().ainvoke(messages)
+
+
+def test_cancelled_call_is_not_recorded(extractor, monkeypatch):
+    use_stub(extractor, SlowStubModel(fast_calls=2))
+    pages = [f"Page {index}\n" + "Text. " * 300 for index in range(5)]
+    monkeypatch.setattr(
+        "logic.topic_extraction.extract_pdf_contents", lambda pdf_path: pages
+    )
+
+    result = asyncio.run(
+        extractor.extract_topics(
+            "lecture.pdf",
+            description="Lecture",
+            budget=ExtractionBudget(max_seconds=0.5),
+        )
+    )
+
+    assert result.partial
+    assert result.pages_covered == 2
+    assert sum(result.metrics.calls_per_tier.values()) == 2